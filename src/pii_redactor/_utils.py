@@ -0,0 +1,49 @@
+"""Internal helpers shared by the detection layers."""
+
+from __future__ import annotations
+from bisect import bisect_left
+
+from .types import EntityMatch
+
+
+def nonoverlap_select(matches: list[EntityMatch]) -> list[EntityMatch]:
+    """Pick non-overlapping matches, preferring higher score then longer span.
+
+    Accepted spans are kept sorted by start; since they never overlap, the
+    only one that can overlap a candidate is the last accepted span that
+    starts before the candidate ends.  O(M log M) instead of O(M²).
+    """
+    if not matches:
+        return matches
+    ranked = sorted(matches, key=lambda m: (-m.score, -(m.end - m.start)))
+    taken: list[EntityMatch] = []
+    starts: list[int] = []
+    ends: list[int] = []
+    for m in ranked:
+        i = bisect_left(starts, m.end)
+        if i and ends[i - 1] > m.start:
+            continue
+        taken.append(m)
+        starts.insert(i, m.start)
+        ends.insert(i, m.end)
+    return sorted(taken, key=lambda m: m.start)
+
+
+class SpanIndex:
+    """Static set of (start, end) spans answering "does [s, e) overlap any?" in O(log n)."""
+
+    __slots__ = ("_starts", "_max_ends")
+
+    def __init__(self, spans: list[tuple[int, int]]) -> None:
+        ordered = sorted(spans)
+        self._starts = [s for s, _ in ordered]
+        # Running max of ends — correct even if the spans overlap each other
+        self._max_ends: list[int] = []
+        reach = 0
+        for _, e in ordered:
+            reach = max(reach, e)
+            self._max_ends.append(reach)
+
+    def overlaps(self, start: int, end: int) -> bool:
+        i = bisect_left(self._starts, end)
+        return i > 0 and self._max_ends[i - 1] > start
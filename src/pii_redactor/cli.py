@@ -13,14 +13,24 @@ Usage:
     python -m pii_redactor.cli dump --session-id sess123
 
 All state is persisted in SQLite so the vault survives across calls.
+
+If $PII_REDACTOR_SOCK points at a running sidecar (server.py --sock), the
+redact/redact-text/rehydrate/sessions/clear commands are forwarded to it so
+the vault and models stay warm — but only when the sidecar serves the same
+--db and, for redaction, uses the same redactor settings as this invocation.
+Otherwise the command runs in-process as usual.
 """
 
 from __future__ import annotations
 import argparse
+import itertools
 import json
+import socket
 import sys
 import os
+from decimal import Decimal
 from pathlib import Path
+from typing import Any
 
 from .redactor import Redactor, RedactorConfig
 from .vault_sqlite import SqliteVault
@@ -32,40 +42,145 @@ DEFAULT_DB = os.environ.get(
 )
 
 
-def _build_redactor(args: argparse.Namespace) -> Redactor:
+def _build_config(args: argparse.Namespace) -> RedactorConfig:
     config = RedactorConfig(
         use_presidio=not args.no_presidio,
         language=args.language,
+        model_name=args.model or None,
         score_threshold=args.threshold,
     )
     if args.skip_types:
         config.skip_types = set(args.skip_types.split(","))
     if args.allow_list:
         config.allow_list = set(args.allow_list.split(","))
-    return Redactor(config)
+    return config
+
+
+def _build_redactor(args: argparse.Namespace) -> Redactor:
+    return Redactor(_build_config(args))
+
+
+def _connect_sidecar(args: argparse.Namespace) -> socket.socket | None:
+    """Connect to the sidecar's Unix socket, if one is listening on this invocation's vault.
+
+    Returns None when no sidecar is listening or it serves another vault
+    file, so the command runs in-process. A live sidecar on the same vault
+    must get the request: its in-memory token counters would go stale if
+    this process wrote to the file too, so an unusable one is fatal.
+    """
+    sock_path = os.environ.get("PII_REDACTOR_SOCK")
+    if not sock_path:
+        return None
+    from .server import read_frame, write_frame
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(sock_path)
+    except OSError:
+        sock.close()
+        return None
+    try:
+        with sock.makefile("rwb") as stream:
+            write_frame(stream, {"op": "health"})
+            health = read_frame(stream)
+    except (OSError, ValueError) as e:
+        sock.close()
+        sys.exit(f"pii-redactor sidecar at {sock_path} is not answering: {e}")
+    if not isinstance(health, dict) or "db" not in health:
+        sock.close()
+        sys.exit(f"pii-redactor sidecar at {sock_path} sent a bad health reply")
+    if health["db"] != str(Path(args.db).expanduser().resolve()):
+        sock.close()
+        return None
+    return sock
+
+
+def _request(sock: socket.socket, op: str, payload: dict[str, Any]) -> dict[str, Any]:
+    """Send one framed request to the sidecar and return its reply."""
+    from .server import read_frame, write_frame
+
+    with sock, sock.makefile("rwb") as stream:
+        write_frame(stream, {"op": op, **payload})
+        reply = read_frame(stream)
+    if reply is None or "error" in reply:
+        sys.exit(f"pii-redactor sidecar error: {reply['error'] if reply else 'no reply'}")
+    return reply
+
+
+def _decimal_to_float(value: Any) -> float:
+    # ijson yields Decimal for non-integral numbers; json.loads would give float
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
 
 
 def cmd_redact(args: argparse.Namespace) -> None:
     """Redact PII from OpenAI-format messages on stdin."""
+    sidecar = _connect_sidecar(args)
+    if sidecar is not None:
+        from .server import redactor_settings
+
+        messages = json.loads(sys.stdin.read())
+        reply = _request(sidecar, "redact", {
+            "session_id": args.session_id,
+            "messages": messages,
+            "settings": redactor_settings(_build_config(args)),
+        })
+        json.dump(reply["messages"], sys.stdout, ensure_ascii=False)
+        sys.stdout.write("\n")
+        return
+
     vault = SqliteVault(args.session_id, db_path=args.db)
     redactor = _build_redactor(args)
 
-    raw = sys.stdin.read()
-    messages = json.loads(raw)
-
-    redacted = redactor.redact_messages(messages, vault)
-
-    json.dump(redacted, sys.stdout, ensure_ascii=False)
+    try:
+        import ijson  # optional — stream messages instead of parsing the whole array
+    except ImportError:
+        ijson = None
+
+    if ijson is None:
+        raw = sys.stdin.read()
+        messages = json.loads(raw)
+        redacted = redactor.redact_messages(messages, vault)
+        json.dump(redacted, sys.stdout, ensure_ascii=False)
+    else:
+        # Same output as json.dump of the full list, emitted one message at a time
+        events = ijson.parse(sys.stdin.buffer)
+        first = next(events, None)
+        if first is None or first[1] != "start_array":
+            vault.close()
+            sys.exit("pii-redactor: redact expects a JSON array of messages")
+        sys.stdout.write("[")
+        for i, msg in enumerate(ijson.items(itertools.chain([first], events), "item")):
+            if i:
+                sys.stdout.write(", ")
+            json.dump(
+                redactor.redact_messages([msg], vault)[0], sys.stdout,
+                ensure_ascii=False, default=_decimal_to_float,
+            )
+        sys.stdout.write("]")
     sys.stdout.write("\n")
     vault.close()
 
 
 def cmd_redact_text(args: argparse.Namespace) -> None:
     """Redact PII from plain text on stdin."""
+    text = sys.stdin.read()
+    sidecar = _connect_sidecar(args)
+    if sidecar is not None:
+        from .server import redactor_settings
+
+        reply = _request(sidecar, "redact-text", {
+            "session_id": args.session_id,
+            "text": text,
+            "settings": redactor_settings(_build_config(args)),
+        })
+        json.dump(reply, sys.stdout, ensure_ascii=False)
+        sys.stdout.write("\n")
+        return
+
     vault = SqliteVault(args.session_id, db_path=args.db)
     redactor = _build_redactor(args)
-
-    text = sys.stdin.read()
     result = redactor.redact(text, vault)
 
     # Output both redacted text and entity metadata
@@ -89,8 +204,14 @@ def cmd_redact_text(args: argparse.Namespace) -> None:
 
 def cmd_rehydrate(args: argparse.Namespace) -> None:
     """Rehydrate tokens in text from stdin."""
-    vault = SqliteVault(args.session_id, db_path=args.db)
     text = sys.stdin.read()
+    sidecar = _connect_sidecar(args)
+    if sidecar is not None:
+        reply = _request(sidecar, "rehydrate", {"session_id": args.session_id, "text": text})
+        sys.stdout.write(reply["text"])
+        return
+
+    vault = SqliteVault(args.session_id, db_path=args.db)
     sys.stdout.write(vault.rehydrate(text))
     vault.close()
 
@@ -105,6 +226,13 @@ def cmd_dump(args: argparse.Namespace) -> None:
 
 def cmd_sessions(args: argparse.Namespace) -> None:
     """List all sessions in the vault."""
+    sidecar = _connect_sidecar(args)
+    if sidecar is not None:
+        reply = _request(sidecar, "sessions", {})
+        json.dump(reply["sessions"], sys.stdout)
+        sys.stdout.write("\n")
+        return
+
     vault = SqliteVault("_list", db_path=args.db)
     sessions = vault.list_sessions()
     json.dump(sessions, sys.stdout)
@@ -114,10 +242,14 @@ def cmd_sessions(args: argparse.Namespace) -> None:
 
 def cmd_clear(args: argparse.Namespace) -> None:
     """Clear vault for a session."""
-    vault = SqliteVault(args.session_id, db_path=args.db)
-    vault.clear()
+    sidecar = _connect_sidecar(args)
+    if sidecar is not None:
+        _request(sidecar, "clear", {"session_id": args.session_id})
+    else:
+        vault = SqliteVault(args.session_id, db_path=args.db)
+        vault.clear()
+        vault.close()
     sys.stderr.write(f"Cleared session {args.session_id}\n")
-    vault.close()
 
 
 def main() -> None:
@@ -129,6 +261,7 @@ def main() -> None:
     parser.add_argument("--session-id", default="default", help="Session ID")
     parser.add_argument("--no-presidio", action="store_true", help="Regex-only mode")
     parser.add_argument("--language", default="en", help="Language code")
+    parser.add_argument("--model", default="", help="spaCy model for Presidio")
     parser.add_argument("--threshold", type=float, default=0.35, help="Score threshold")
     parser.add_argument("--skip-types", default="", help="Comma-separated entity types to skip")
     parser.add_argument("--allow-list", default="", help="Comma-separated values to never redact")
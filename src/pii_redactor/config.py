@@ -9,6 +9,7 @@ Example YAML:
       enabled: true
       use_presidio: true
       language: en
+      model_name: en_spacy_pii_fast
       score_threshold: 0.35
       entities:
         - PERSON
@@ -58,6 +59,7 @@ def load_config(data: dict[str, Any]) -> dict[str, Any]:
         "enabled": data.get("enabled", True),
         "use_presidio": data.get("use_presidio", True),
         "language": data.get("language", "en"),
+        "model_name": data.get("model_name"),
         "score_threshold": data.get("score_threshold", 0.35),
         "entities": data.get("entities"),
         "skip_types": set(data.get("skip_types", [])),
@@ -88,6 +90,7 @@ def create_middleware(
     redactor_config = RedactorConfig(
         use_presidio=cfg["use_presidio"],
         language=cfg["language"],
+        model_name=cfg.get("model_name"),
         score_threshold=cfg["score_threshold"],
         presidio_entities=cfg.get("entities"),
         skip_types=cfg["skip_types"],
@@ -42,7 +42,9 @@ class RedactMiddleware:
 
     def pre_send(self, messages: list[dict]) -> list[dict]:
         """Redact PII from outbound messages."""
-        return self.redactor.redact_messages(messages, self.vault)
+        redacted = self.redactor.redact_messages(messages, self.vault)
+        self.vault.flush()
+        return redacted
 
     def post_receive(self, text: str) -> str:
         """Rehydrate tokens in the model's response."""
@@ -50,7 +52,9 @@ class RedactMiddleware:
 
     def redact_text(self, text: str) -> str:
         """Redact a single string (convenience)."""
-        return self.redactor.redact(text, self.vault).text
+        redacted = self.redactor.redact(text, self.vault).text
+        self.vault.flush()
+        return redacted
 
     def rehydrate_text(self, text: str) -> str:
         """Alias for post_receive."""
@@ -6,7 +6,20 @@ deterministic stuff: emails, phones, IPs, credit cards, SSNs, etc.
 
 from __future__ import annotations
 import re
+import threading
+from functools import lru_cache
 from .types import EntityMatch
+from ._utils import nonoverlap_select
+
+try:  # optional (Linux x86-64): Hyperscan SIMD multi-pattern scan
+    import hyperscan as _hs
+except ImportError:
+    _hs = None
+
+try:  # optional: google-re2 finds every pattern that can match in one DFA pass
+    import re2 as _re2
+except ImportError:
+    _re2 = None
 
 # Each pattern: (entity_type, compiled_regex, score)
 _PATTERNS: list[tuple[str, re.Pattern, float]] = [
@@ -68,11 +81,263 @@ _PATTERNS: list[tuple[str, re.Pattern, float]] = [
 ]
 
 
-def scan_regex(text: str) -> list[EntityMatch]:
-    """Run all regex patterns against text. Returns non-overlapping matches."""
+# Every pattern needs one of these cheap-to-test features to match at all.
+# Most chat text has none of them, so the regex layer can skip it outright.
+_TRIGGERS: dict[str, str] = {
+    "EMAIL": "@",
+    "PHONE": "digit",
+    "CREDIT_CARD": "digit",
+    "SSN": "digit",
+    "IP_ADDRESS": "digit",
+    "DATE_OF_BIRTH": "digit",
+    "AU_TFN": "digit",
+    "AU_MEDICARE": "digit",
+    "URL_WITH_SECRET": "://",
+    "API_KEY": "assign",
+}
+_DIGIT = re.compile(r"\d")  # Unicode-aware, same as \d in the patterns
+
+
+def _present_triggers(text: str) -> set[str]:
+    present: set[str] = set()
+    if "@" in text:
+        present.add("@")
+    if _DIGIT.search(text):
+        present.add("digit")
+    if "://" in text:
+        present.add("://")
+    if ":" in text or "=" in text:
+        present.add("assign")
+    return present
+
+
+# Lookarounds only ever narrow a match, so dropping them gives a superset
+# pattern that is safe to use as a prefilter (RE2 doesn't support them).
+_LOOKAROUND = re.compile(r"\(\?<?[=!][^()]*\)")
+
+
+# On str, Python's \s also matches \v and \x1c-\x1f; RE2's and Hyperscan's
+# don't.  Spelling the class out keeps the prefilter a superset (\S needs no
+# rewrite: theirs matches more than Python's, which is the safe direction).
+_PY_ASCII_SPACE = r"\t\n\x0b\x0c\r \x1c-\x1f"
+
+
+def _expand_whitespace(source: str) -> str:
+    out: list[str] = []
+    in_class = False
+    i = 0
+    while i < len(source):
+        c = source[i]
+        if c == "\\" and i + 1 < len(source):
+            escape = source[i:i + 2]
+            if escape == r"\s":
+                escape = _PY_ASCII_SPACE if in_class else f"[{_PY_ASCII_SPACE}]"
+            out.append(escape)
+            i += 2
+            continue
+        if c == "[":
+            in_class = True
+        elif c == "]":
+            in_class = False
+        out.append(c)
+        i += 1
+    return "".join(out)
+
+
+def _superset_source(pattern: re.Pattern) -> str:
+    """Pattern source an ASCII-only engine matches wherever Python's re would."""
+    return _expand_whitespace(_LOOKAROUND.sub("", pattern.pattern))
+
+
+def _prefilter_source(pattern: re.Pattern) -> str:
+    source = _superset_source(pattern)
+    if pattern.flags & re.IGNORECASE:
+        source = "(?i)" + source
+    return source
+
+
+Pattern = tuple[str, re.Pattern, float]
+
+
+def _build_re2_set(patterns: tuple[Pattern, ...]) -> tuple[object | None, list[int], list[int]]:
+    """Compile patterns into one RE2 set.
+
+    Returns (set, set_index → pattern_index, pattern indices that must always run).
+    """
+    if _re2 is None or not hasattr(_re2, "Set") or not patterns:
+        return None, [], []
+    regex_set = _re2.Set.SearchSet(_re2.Options())
+    ids: list[int] = []
+    always: list[int] = []
+    for i, (_, pattern, _) in enumerate(patterns):
+        try:
+            regex_set.Add(_prefilter_source(pattern))
+        except _re2.error:
+            always.append(i)
+            continue
+        ids.append(i)
+    regex_set.Compile()
+    return regex_set, ids, always
+
+
+def _build_hyperscan(patterns: tuple[Pattern, ...]) -> object | None:
+    """Compile patterns into one Hyperscan block-mode database (ids = pattern index)."""
+    if _hs is None or not patterns:
+        return None
+    expressions: list[bytes] = []
+    flags: list[int] = []
+    for _, pattern, _ in patterns:
+        expressions.append(_superset_source(pattern).encode())
+        flag = _hs.HS_FLAG_UTF8 | _hs.HS_FLAG_SINGLEMATCH
+        if pattern.flags & re.IGNORECASE:
+            flag |= _hs.HS_FLAG_CASELESS
+        flags.append(flag)
+    database = _hs.Database()
+    try:
+        database.compile(
+            expressions=expressions,
+            ids=list(range(len(expressions))),
+            elements=len(expressions),
+            flags=flags,
+        )
+    except _hs.error:
+        return None
+    return database
+
+
+def _build_combined(patterns: tuple[Pattern, ...]) -> re.Pattern:
+    """One alternation of every pattern — matches iff any single pattern does."""
+    return re.compile("|".join(
+        f"(?i:{pattern.pattern})" if pattern.flags & re.IGNORECASE else f"(?:{pattern.pattern})"
+        for _, pattern, _ in patterns
+    ))
+
+
+def _on_hs_match(pattern_id: int, start: int, end: int, flags: int, hit: set[int]) -> None:
+    hit.add(pattern_id)
+
+
+class _Scanner:
+    """Prefilters compiled once for a fixed pattern set.
+
+    Backend: hyperscan → re2 → stdlib re (one combined alternation).
+    Backends are compiled on the first scan, not on construction —
+    Hyperscan alone takes ~100 ms, which would otherwise land on import.
+    """
+
+    __slots__ = (
+        "patterns", "gated", "ready", "build_lock", "hs_db", "hs_local",
+        "re2_set", "re2_ids", "re2_always", "combined",
+    )
+
+    def __init__(self, patterns: tuple[Pattern, ...]) -> None:
+        self.patterns = patterns
+        # Only when every pattern has a trigger can "no triggers" mean "no matches"
+        self.gated = all(etype in _TRIGGERS for etype, _, _ in patterns)
+        self.hs_local = threading.local()  # scratch space can't be shared between scans
+        self.ready = False
+        self.build_lock = threading.Lock()
+
+    def _build(self) -> None:
+        with self.build_lock:
+            if self.ready:
+                return
+            self.hs_db = _build_hyperscan(self.patterns)
+            if self.hs_db is None:
+                self.re2_set, self.re2_ids, self.re2_always = _build_re2_set(self.patterns)
+            else:
+                self.re2_set, self.re2_ids, self.re2_always = None, [], []
+            self.combined = _build_combined(self.patterns)
+            self.ready = True
+
+    def _hs_scan(self, text: str) -> set[int]:
+        scratch = getattr(self.hs_local, "scratch", None)
+        if scratch is None:
+            scratch = self.hs_local.scratch = _hs.Scratch(self.hs_db)
+        hit: set[int] = set()
+        self.hs_db.scan(text.encode(), match_event_handler=_on_hs_match, context=hit, scratch=scratch)
+        return hit
+
+    def candidates(self, text: str) -> list[Pattern]:
+        """Patterns that can possibly match text."""
+        return self.prefilter(text)[0]
+
+    def prefilter(self, text: str) -> tuple[list[Pattern], int]:
+        """candidates() plus an offset no candidate can match before."""
+        if not self.patterns:
+            return [], 0
+        present = _present_triggers(text)
+        if self.gated and not present:
+            return [], 0
+        if not self.ready:
+            self._build()
+        # Hyperscan's and RE2's \d and \b are ASCII-only while Python's are
+        # Unicode-aware, so they are only faithful prefilters for ASCII input.
+        if text.isascii():
+            hit: set[int] | None = None
+            if self.hs_db is not None:
+                hit = self._hs_scan(text)
+            elif self.re2_set is not None:
+                hit = {self.re2_ids[i] for i in self.re2_set.Match(text) or ()}
+                hit.update(self.re2_always)
+            if hit is not None:
+                return [p for i, p in enumerate(self.patterns) if i in hit], 0
+        # Stdlib path: one C-level sweep rejects PII-free text outright, and
+        # its leftmost match is where every pattern's own search can start.
+        m = self.combined.search(text)
+        if m is None:
+            return [], 0
+        return [
+            p for p in self.patterns
+            if p[0] not in _TRIGGERS or _TRIGGERS[p[0]] in present
+        ], m.start()
+
+
+@lru_cache(maxsize=32)
+def _scanner(patterns: tuple[Pattern, ...]) -> _Scanner:
+    return _Scanner(patterns)
+
+
+_DEFAULT_SCANNER = _scanner(tuple(_PATTERNS))
+
+
+def active_patterns(skip_types: set[str] | frozenset[str] = frozenset()) -> tuple[Pattern, ...]:
+    """The built-in patterns minus any entity types in skip_types."""
+    return tuple(p for p in _PATTERNS if p[0] not in skip_types)
+
+
+def regex_scanner(skip_types: set[str] | frozenset[str] = frozenset()) -> _Scanner:
+    """Prefilters for the built-in patterns minus skip_types.
+
+    Resolve this once and pass it to scan_regex(scanner=...): looking a
+    scanner up by pattern tuple hashes every pattern on each call.
+    """
+    return _scanner(active_patterns(skip_types)) if skip_types else _DEFAULT_SCANNER
+
+
+def _candidate_patterns(text: str, patterns: tuple[Pattern, ...] | None = None) -> list[Pattern]:
+    scanner = _DEFAULT_SCANNER if patterns is None else _scanner(patterns)
+    return scanner.candidates(text)
+
+
+def scan_regex(
+    text: str,
+    *,
+    patterns: tuple[Pattern, ...] | None = None,
+    scanner: _Scanner | None = None,
+) -> list[EntityMatch]:
+    """Run regex patterns against text. Returns non-overlapping matches.
+
+    patterns defaults to every built-in pattern; see active_patterns().
+    A scanner from regex_scanner() takes precedence and skips the lookup.
+    """
+    if scanner is None:
+        scanner = _DEFAULT_SCANNER if patterns is None else _scanner(patterns)
+    candidates, start = scanner.prefilter(text)
     matches: list[EntityMatch] = []
-    for entity_type, pattern, score in _PATTERNS:
-        for m in pattern.finditer(text):
+    for entity_type, pattern, score in candidates:
+        # finditer(text, start) still sees text[:start] for \b and lookbehinds
+        for m in pattern.finditer(text, start):
             matches.append(EntityMatch(
                 entity_type=entity_type,
                 start=m.start(),
@@ -86,14 +351,4 @@ def scan_regex(text: str) -> list[EntityMatch]:
 
 def _deduplicate(matches: list[EntityMatch]) -> list[EntityMatch]:
     """Remove overlapping matches, keeping higher-score ones."""
-    if not matches:
-        return matches
-    # Sort by score desc, then by span length desc
-    ranked = sorted(matches, key=lambda m: (-m.score, -(m.end - m.start)))
-    taken: list[EntityMatch] = []
-    used_ranges: list[tuple[int, int]] = []
-    for m in ranked:
-        if not any(m.start < e and m.end > s for s, e in used_ranges):
-            taken.append(m)
-            used_ranges.append((m.start, m.end))
-    return sorted(taken, key=lambda m: m.start)
+    return nonoverlap_select(matches)
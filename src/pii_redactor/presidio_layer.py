@@ -5,37 +5,93 @@ regex can't reliably detect. Uses spaCy under the hood.
 """
 
 from __future__ import annotations
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from typing import TYPE_CHECKING
 
 from .types import EntityMatch
+from ._utils import SpanIndex
 
 if TYPE_CHECKING:
     from presidio_analyzer import AnalyzerEngine
 
-# Lazy singleton — don't load spaCy until first use
-_engine: AnalyzerEngine | None = None
-_engine_lang: str = ""
+# Lazy engines, one per (language, model) — don't load spaCy until first use
+_engines: dict[tuple[str, str], AnalyzerEngine] = {}
+_engines_lock = threading.Lock()  # a warmup thread may race the first request
 
+# PII-tuned spaCy CNN — ~5× the throughput of en_core_web_sm on CPU
+DEFAULT_MODEL = "en_spacy_pii_fast"
+# Used instead when DEFAULT_MODEL isn't installed (it's not on spaCy's download index)
+FALLBACK_MODEL = "en_core_web_sm"
 
-def _get_engine(language: str = "en") -> AnalyzerEngine:
-    """Lazy-init the Presidio analyzer engine."""
-    global _engine, _engine_lang
-    if _engine is None or _engine_lang != language:
-        from presidio_analyzer import AnalyzerEngine
-        from presidio_analyzer.nlp_engine import NlpEngineProvider
+# spaCy label → Presidio entity.  Covers both the general-purpose models
+# (PERSON/GPE/NORP/...) and the PII-tuned ones (PER/LOC/NRP/DATE_TIME/...).
+_NER_MAPPING = {
+    "PER": "PERSON",
+    "PERSON": "PERSON",
+    "NORP": "NRP",
+    "NRP": "NRP",
+    "FAC": "LOCATION",
+    "LOC": "LOCATION",
+    "GPE": "LOCATION",
+    "LOCATION": "LOCATION",
+    "ORG": "ORGANIZATION",
+    "ORGANIZATION": "ORGANIZATION",
+    "DATE": "DATE_TIME",
+    "TIME": "DATE_TIME",
+    "DATE_TIME": "DATE_TIME",
+}
 
-        provider = NlpEngineProvider(nlp_configuration={
-            "nlp_engine_name": "spacy",
-            "models": [{"lang_code": language, "model_name": f"{language}_core_web_sm"}],
-        })
-        nlp_engine = provider.create_engine()
-        _engine = AnalyzerEngine(nlp_engine=nlp_engine, supported_languages=[language])
-        _engine_lang = language
-    return _engine
+
+@lru_cache(maxsize=None)
+def _default_model(language: str) -> str:
+    if language != "en":
+        return f"{language}_core_web_sm"
+    from spacy.util import is_package
+
+    return DEFAULT_MODEL if is_package(DEFAULT_MODEL) else FALLBACK_MODEL
+
+
+def _get_engine(language: str = "en", model_name: str | None = None) -> AnalyzerEngine:
+    """Lazy-init the Presidio analyzer engine for a language/model pair."""
+    model_name = model_name or _default_model(language)
+    key = (language, model_name)
+    engine = _engines.get(key)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(key)
+            if engine is None:
+                from presidio_analyzer import AnalyzerEngine
+                from presidio_analyzer.nlp_engine import NlpEngineProvider
+
+                provider = NlpEngineProvider(nlp_configuration={
+                    "nlp_engine_name": "spacy",
+                    "models": [{"lang_code": language, "model_name": model_name}],
+                    "ner_model_configuration": {"model_to_presidio_entity_mapping": _NER_MAPPING},
+                })
+                nlp_engine = provider.create_engine()
+                engine = AnalyzerEngine(nlp_engine=nlp_engine, supported_languages=[language])
+                _engines[key] = engine
+    return engine
+
+
+def warmup(language: str = "en", model_name: str | None = None) -> threading.Thread:
+    """Load the engine on a background thread so the first request doesn't block on spaCy."""
+    thread = threading.Thread(
+        target=_get_engine,
+        args=(language, model_name),
+        name="pii-redactor-warmup",
+        daemon=True,
+    )
+    thread.start()
+    return thread
 
 
 # Default entity types to detect (Presidio's full set is much larger)
-DEFAULT_ENTITIES = [
+DEFAULT_ENTITIES = (
     "PERSON",
     "ORGANIZATION",  # maps to ORG in output
     "LOCATION",
@@ -43,46 +99,96 @@ DEFAULT_ENTITIES = [
     "MEDICAL_LICENSE",
     "URL",
     "DATE_TIME",
-]
+)
+
+
+# Analysis results by (settings, text digest, text length).  Keyed on a
+# digest rather than the text so the cache never keeps raw PII alive.
+_ANALYZE_CACHE_SIZE = 1024
+_analyze_cache: OrderedDict[tuple, tuple[tuple[str, int, int, float], ...]] = OrderedDict()
+_analyze_lock = threading.Lock()
+
+
+def _analyze(
+    language: str,
+    model_name: str | None,
+    entities: tuple[str, ...],
+    score_threshold: float,
+    text: str,
+) -> tuple[tuple[str, int, int, float], ...]:
+    """Cached Presidio analysis — chat clients resend the same history every turn.
+
+    Returns immutable (entity_type, start, end, score) tuples.
+    """
+    digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    key = (language, model_name, entities, score_threshold, digest, len(text))
+    with _analyze_lock:
+        cached = _analyze_cache.get(key)
+        if cached is not None:
+            _analyze_cache.move_to_end(key)
+            return cached
+    engine = _get_engine(language, model_name)
+    results = engine.analyze(
+        text=text,
+        language=language,
+        entities=list(entities),
+        score_threshold=score_threshold,
+    )
+    # Intern types so vault dicts keyed on them hash and compare by identity
+    analysis = tuple((sys.intern(r.entity_type), r.start, r.end, r.score) for r in results)
+    with _analyze_lock:
+        _analyze_cache[key] = analysis
+        if len(_analyze_cache) > _ANALYZE_CACHE_SIZE:
+            _analyze_cache.popitem(last=False)
+    return analysis
 
 
 def scan_presidio(
     text: str,
     *,
     language: str = "en",
+    model_name: str | None = None,
     entities: list[str] | None = None,
     score_threshold: float = 0.35,
     exclude_spans: list[tuple[int, int]] | None = None,
+    allow_list: set[str] | frozenset[str] = frozenset(),
 ) -> list[EntityMatch]:
     """Run Presidio analysis on text.
 
     Args:
         text: Input text to scan.
         language: ISO language code.
+        model_name: spaCy model (None = DEFAULT_MODEL for English,
+            ``{language}_core_web_sm`` otherwise).
         entities: Entity types to detect (None = DEFAULT_ENTITIES).
         score_threshold: Minimum confidence score.
         exclude_spans: Spans already matched by regex layer — skip overlaps.
+        allow_list: Values that should never be redacted — dropped here
+            before any EntityMatch is built.
     """
-    engine = _get_engine(language)
-    results = engine.analyze(
-        text=text,
-        language=language,
-        entities=entities or DEFAULT_ENTITIES,
-        score_threshold=score_threshold,
+    results = _analyze(
+        language,
+        model_name,
+        tuple(entities) if entities else DEFAULT_ENTITIES,
+        score_threshold,
+        text,
     )
 
-    exclude = exclude_spans or []
+    exclude = SpanIndex(exclude_spans or [])
     matches: list[EntityMatch] = []
-    for r in results:
+    for entity_type, start, end, score in results:
         # Skip if overlapping with a regex match (regex wins for structured PII)
-        if any(r.start < e and r.end > s for s, e in exclude):
+        if exclude.overlaps(start, end):
+            continue
+        value = text[start:end]
+        if value in allow_list:
             continue
         matches.append(EntityMatch(
-            entity_type=r.entity_type,
-            start=r.start,
-            end=r.end,
-            text=text[r.start:r.end],
-            score=r.score,
+            entity_type=entity_type,
+            start=start,
+            end=end,
+            text=value,
+            score=score,
             source="presidio",
         ))
 
@@ -14,12 +14,16 @@ Usage:
 """
 
 from __future__ import annotations
+import os
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from typing import Callable
 
 from .types import EntityMatch, RedactedMessage
-from .vault import Vault
-from .patterns import scan_regex
+from .vault import Vault, format_token
+from .patterns import regex_scanner, scan_regex
+from .presidio_layer import DEFAULT_ENTITIES
+from ._utils import nonoverlap_select
 
 
 @dataclass
@@ -27,6 +31,7 @@ class RedactorConfig:
     """Configuration for the Redactor."""
     use_presidio: bool = True         # enable Layer 2 (NER)
     language: str = "en"
+    model_name: str | None = None     # spaCy model for Presidio (None = per-language default)
     score_threshold: float = 0.35     # minimum confidence for Presidio
     presidio_entities: list[str] | None = None  # None = defaults
     custom_scanners: list[Callable[[str], list[EntityMatch]]] = field(default_factory=list)
@@ -46,28 +51,45 @@ class Redactor:
 
     def __init__(self, config: RedactorConfig | None = None) -> None:
         self.config = config or RedactorConfig()
+        # Specialize the scanners for skip_types up front so skipped
+        # entity types are never scanned for at all
+        skip_types = self.config.skip_types
+        self._scanner = regex_scanner(skip_types)
+        entities = self.config.presidio_entities or list(DEFAULT_ENTITIES)
+        self._presidio_entities = [e for e in entities if e not in skip_types]
 
     def redact(self, text: str, vault: Vault) -> RedactedMessage:
         """Redact PII from text, storing mappings in the vault.
 
         Returns a RedactedMessage with the sanitized text and metadata.
         """
+        matches = self._detect(text)
+        ids = vault.get_or_create_token_ids([(m.entity_type, m.text) for m in matches])
+        return _apply(text, matches, ids)
+
+    def _detect(self, text: str) -> list[EntityMatch]:
+        """Run all layers and return the final non-overlapping matches.
+
+        Touches no vault state, so it is safe to run concurrently.
+        """
         all_matches: list[EntityMatch] = []
 
         # --- Layer 1: Regex (fast, deterministic) ---
-        regex_matches = scan_regex(text)
+        regex_matches = scan_regex(text, scanner=self._scanner)
         all_matches.extend(regex_matches)
 
         # --- Layer 2: Presidio NER (if enabled) ---
-        if self.config.use_presidio:
+        if self.config.use_presidio and self._presidio_entities:
             from .presidio_layer import scan_presidio
             regex_spans = [(m.start, m.end) for m in regex_matches]
             presidio_matches = scan_presidio(
                 text,
                 language=self.config.language,
-                entities=self.config.presidio_entities,
+                model_name=self.config.model_name,
+                entities=self._presidio_entities,
                 score_threshold=self.config.score_threshold,
                 exclude_spans=regex_spans,
+                allow_list=self.config.allow_list,
             )
             all_matches.extend(presidio_matches)
 
@@ -77,26 +99,16 @@ class Redactor:
             all_matches.extend(custom_matches)
 
         # --- Filter ---
-        filtered: list[EntityMatch] = []
-        for m in all_matches:
-            if m.entity_type in self.config.skip_types:
-                continue
-            if m.text in self.config.allow_list:
-                continue
-            filtered.append(m)
+        skip_types = self.config.skip_types
+        allow_list = self.config.allow_list
+        if skip_types or allow_list:
+            all_matches = [
+                m for m in all_matches
+                if m.entity_type not in skip_types and m.text not in allow_list
+            ]
 
         # --- Deduplicate across layers (keep highest score) ---
-        filtered = _dedupe_cross_layer(filtered)
-
-        # --- Apply replacements (right-to-left to preserve offsets) ---
-        token_map: dict[str, str] = {}
-        result = text
-        for match in sorted(filtered, key=lambda m: m.start, reverse=True):
-            token = vault.get_or_create_token(match.entity_type, match.text)
-            token_map[token] = match.text
-            result = result[:match.start] + token + result[match.end:]
-
-        return RedactedMessage(text=result, entities=filtered, token_map=token_map)
+        return _dedupe_cross_layer(all_matches)
 
     def redact_messages(
         self,
@@ -110,26 +122,51 @@ class Redactor:
         Returns new message dicts with content redacted.  Does NOT
         mutate the originals.
         """
-        out: list[dict] = []
-        for msg in messages:
-            content = msg.get(content_key)
-            if isinstance(content, str) and content:
-                result = self.redact(content, vault)
-                out.append({**msg, content_key: result.text})
-            else:
-                out.append(msg)
+        indices = [
+            i for i, msg in enumerate(messages)
+            if isinstance(msg.get(content_key), str) and msg[content_key]
+        ]
+        texts = [messages[i][content_key] for i in indices]
+
+        # Detection is independent per message; NER is worth spreading over threads
+        if self.config.use_presidio and len(texts) > 1:
+            workers = min(len(texts), os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                detected = list(pool.map(self._detect, texts))
+        else:
+            detected = [self._detect(text) for text in texts]
+
+        # One vault call for the whole batch, in message order so numbering
+        # matches redacting the messages one by one
+        ids = vault.get_or_create_token_ids(
+            [(m.entity_type, m.text) for matches in detected for m in matches]
+        )
+
+        out = list(messages)
+        offset = 0
+        for i, text, matches in zip(indices, texts, detected):
+            result = _apply(text, matches, ids[offset:offset + len(matches)])
+            offset += len(matches)
+            out[i] = {**messages[i], content_key: result.text}
         return out
 
 
+def _apply(text: str, matches: list[EntityMatch], ids: list[int]) -> RedactedMessage:
+    """Substitute tokens for sorted, non-overlapping matches in one left-to-right pass."""
+    token_map: dict[str, str] = {}
+    parts: list[str] = []
+    cursor = 0
+    for match, idx in zip(matches, ids):
+        token = format_token(match.entity_type, idx)
+        token_map[token] = match.text
+        parts.append(text[cursor:match.start])
+        parts.append(token)
+        cursor = match.end
+    parts.append(text[cursor:])
+
+    return RedactedMessage(text="".join(parts), entities=matches, token_map=token_map)
+
+
 def _dedupe_cross_layer(matches: list[EntityMatch]) -> list[EntityMatch]:
     """Remove overlapping matches across layers, keeping highest score."""
-    if not matches:
-        return matches
-    ranked = sorted(matches, key=lambda m: (-m.score, -(m.end - m.start)))
-    taken: list[EntityMatch] = []
-    used: list[tuple[int, int]] = []
-    for m in ranked:
-        if not any(m.start < e and m.end > s for s, e in used):
-            taken.append(m)
-            used.append((m.start, m.end))
-    return sorted(taken, key=lambda m: m.start)
+    return nonoverlap_select(matches)
@@ -13,14 +13,29 @@ Endpoints:
 
 All endpoints expect/return JSON.
 Body format: {"session_id": "...", "data": ...}
+
+With --sock (or $PII_REDACTOR_SOCK) the same operations are also served on
+an AF_UNIX socket, which the CLI uses instead of opening the vault itself.
+Frames are a 4-byte big-endian length followed by UTF-8 JSON; requests are
+{"op": "redact", "session_id": "...", ...} with op = endpoint name.
+
+redact and redact-text accept an optional "settings" object (see
+redactor_settings) so one sidecar can serve clients with different flags
+while staying the only writer of its vault.
 """
 
 from __future__ import annotations
 import json
+import errno
 import os
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import socket
+import socketserver
+import stat
+import struct
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO
 
 from .redactor import Redactor, RedactorConfig
 from .vault_sqlite import SqliteVault
@@ -30,28 +45,138 @@ DEFAULT_DB = os.environ.get(
     "PII_REDACTOR_DB",
     str(Path.home() / ".pii-redactor" / "vault.db"),
 )
+DEFAULT_SOCK = os.environ.get("PII_REDACTOR_SOCK", "")
 
 # Shared state
 _redactor: Redactor | None = None
+# Redactors built for clients whose settings differ from the sidecar's own
+_redactors: dict[str, Redactor] = {}
 _vaults: dict[str, SqliteVault] = {}
 _db_path: str = DEFAULT_DB
+# Guards lazy creation of the shared objects; SqliteVault locks its own writes
+_lock = threading.Lock()
 
 
 def _get_redactor() -> Redactor:
     global _redactor
     if _redactor is None:
-        use_presidio = os.environ.get("PII_REDACTOR_NO_PRESIDIO", "") == ""
-        _redactor = Redactor(RedactorConfig(
-            use_presidio=use_presidio,
-            score_threshold=float(os.environ.get("PII_REDACTOR_THRESHOLD", "0.35")),
-        ))
+        with _lock:
+            if _redactor is None:
+                use_presidio = os.environ.get("PII_REDACTOR_NO_PRESIDIO", "") == ""
+                _redactor = Redactor(RedactorConfig(
+                    use_presidio=use_presidio,
+                    model_name=os.environ.get("PII_REDACTOR_MODEL") or None,
+                    score_threshold=float(os.environ.get("PII_REDACTOR_THRESHOLD", "0.35")),
+                ))
+                if use_presidio and os.environ.get("PII_REDACTOR_WARMUP", "1") != "0":
+                    from .presidio_layer import warmup
+                    warmup(_redactor.config.language, _redactor.config.model_name)
     return _redactor
 
 
 def _get_vault(session_id: str) -> SqliteVault:
-    if session_id not in _vaults:
-        _vaults[session_id] = SqliteVault(session_id, db_path=_db_path)
-    return _vaults[session_id]
+    vault = _vaults.get(session_id)
+    if vault is None:
+        with _lock:
+            vault = _vaults.get(session_id)
+            if vault is None:
+                vault = _vaults[session_id] = SqliteVault(session_id, db_path=_db_path)
+    return vault
+
+
+def redactor_settings(config: RedactorConfig) -> dict[str, Any]:
+    """JSON-comparable view of the settings that decide what gets redacted."""
+    return {
+        "use_presidio": config.use_presidio,
+        "language": config.language,
+        "model_name": config.model_name,
+        "score_threshold": config.score_threshold,
+        "presidio_entities": sorted(config.presidio_entities) if config.presidio_entities else None,
+        "skip_types": sorted(config.skip_types),
+        "allow_list": sorted(config.allow_list),
+    }
+
+
+def config_from_settings(settings: dict[str, Any]) -> RedactorConfig:
+    """Inverse of redactor_settings()."""
+    return RedactorConfig(
+        use_presidio=bool(settings["use_presidio"]),
+        language=settings["language"],
+        model_name=settings["model_name"],
+        score_threshold=float(settings["score_threshold"]),
+        presidio_entities=settings["presidio_entities"],
+        skip_types=set(settings["skip_types"]),
+        allow_list=set(settings["allow_list"]),
+    )
+
+
+def _redactor_for(settings: dict[str, Any] | None) -> Redactor:
+    """Redactor for a request's settings; None means the sidecar's own."""
+    redactor = _get_redactor()
+    if settings is None or settings == redactor_settings(redactor.config):
+        return redactor
+    key = json.dumps(settings, sort_keys=True)
+    custom = _redactors.get(key)
+    if custom is None:
+        with _lock:
+            custom = _redactors.get(key)
+            if custom is None:
+                custom = _redactors[key] = Redactor(config_from_settings(settings))
+    return custom
+
+
+def _handle_get(op: str) -> tuple[int, Any]:
+    if op == "health":
+        # db and redactor let clients check the sidecar would act as they would
+        return 200, {
+            "status": "ok",
+            "vault_sessions": len(_vaults),
+            "db": str(Path(_db_path).expanduser().resolve()),
+            "redactor": redactor_settings(_get_redactor().config),
+        }
+    if op == "sessions":
+        vault = _get_vault("_list")
+        return 200, {"sessions": vault.list_sessions()}
+    return 404, {"error": "not found"}
+
+
+def _handle_post(op: str, body: dict[str, Any]) -> tuple[int, Any]:
+    try:
+        session_id = body.get("session_id", "default")
+        vault = _get_vault(session_id)
+        redactor = _redactor_for(body.get("settings"))
+
+        if op == "redact":
+            messages = body.get("messages", [])
+            redacted = redactor.redact_messages(messages, vault)
+            vault.flush()  # persist before the tokens leave the process
+            return 200, {"messages": redacted}
+
+        if op == "redact-text":
+            text = body.get("text", "")
+            result = redactor.redact(text, vault)
+            vault.flush()
+            return 200, {
+                "text": result.text,
+                "entities": [
+                    {"type": e.entity_type, "text": e.text, "score": e.score, "source": e.source}
+                    for e in result.entities
+                ],
+                "token_count": len(result.token_map),
+            }
+
+        if op == "rehydrate":
+            text = body.get("text", "")
+            return 200, {"text": vault.rehydrate(text)}
+
+        if op == "clear":
+            vault.clear()
+            return 200, {"status": "cleared", "session_id": session_id}
+
+        return 404, {"error": "not found"}
+
+    except Exception as e:
+        return 500, {"error": str(e)}
 
 
 class PIIHandler(BaseHTTPRequestHandler):
@@ -75,60 +200,100 @@ class PIIHandler(BaseHTTPRequestHandler):
         pass
 
     def do_GET(self) -> None:
-        if self.path == "/health":
-            self._respond(200, {"status": "ok", "vault_sessions": len(_vaults)})
-        elif self.path == "/sessions":
-            vault = _get_vault("_list")
-            self._respond(200, {"sessions": vault.list_sessions()})
-        else:
-            self._respond(404, {"error": "not found"})
+        self._respond(*_handle_get(self.path.lstrip("/")))
 
     def do_POST(self) -> None:
         try:
             body = self._read_json()
-            session_id = body.get("session_id", "default")
-            vault = _get_vault(session_id)
-            redactor = _get_redactor()
-
-            if self.path == "/redact":
-                messages = body.get("messages", [])
-                redacted = redactor.redact_messages(messages, vault)
-                self._respond(200, {"messages": redacted})
-
-            elif self.path == "/redact-text":
-                text = body.get("text", "")
-                result = redactor.redact(text, vault)
-                self._respond(200, {
-                    "text": result.text,
-                    "entities": [
-                        {"type": e.entity_type, "text": e.text, "score": e.score, "source": e.source}
-                        for e in result.entities
-                    ],
-                    "token_count": len(result.token_map),
-                })
-
-            elif self.path == "/rehydrate":
-                text = body.get("text", "")
-                self._respond(200, {"text": vault.rehydrate(text)})
-
-            elif self.path == "/clear":
-                vault.clear()
-                self._respond(200, {"status": "cleared", "session_id": session_id})
+        except Exception as e:
+            self._respond(500, {"error": str(e)})
+            return
+        self._respond(*_handle_post(self.path.lstrip("/"), body))
+
+
+# ── Unix socket transport ────────────────────────────────────────────
+
+_FRAME_HEADER = struct.Struct(">I")
+
+
+def write_frame(stream: BinaryIO, data: Any) -> None:
+    """Write one length-prefixed JSON frame."""
+    payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+    stream.write(_FRAME_HEADER.pack(len(payload)) + payload)
+    stream.flush()
+
+
+def read_frame(stream: BinaryIO) -> Any | None:
+    """Read one length-prefixed JSON frame, or None at EOF."""
+    header = stream.read(_FRAME_HEADER.size)
+    if len(header) < _FRAME_HEADER.size:
+        return None
+    (length,) = _FRAME_HEADER.unpack(header)
+    return json.loads(stream.read(length).decode("utf-8"))
+
+
+class PIIUnixHandler(socketserver.StreamRequestHandler):
+    """Unix socket handler — same operations as PIIHandler, framed JSON."""
 
+    def handle(self) -> None:
+        while True:
+            try:
+                request = read_frame(self.rfile)
+            except ValueError as e:
+                write_frame(self.wfile, {"error": str(e)})
+                return
+            if request is None:
+                return
+            op = request.pop("op", "")
+            if op in ("health", "sessions"):
+                _, data = _handle_get(op)
             else:
-                self._respond(404, {"error": "not found"})
+                _, data = _handle_post(op, request)
+            write_frame(self.wfile, data)
 
-        except Exception as e:
-            self._respond(500, {"error": str(e)})
+
+def _remove_stale_socket(sock_path: str) -> None:
+    """Unlink sock_path only if it is a socket nobody is listening on."""
+    try:
+        mode = os.lstat(sock_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(errno.EEXIST, "exists and is not a socket", sock_path)
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(sock_path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.unlink(sock_path)  # stale socket from a previous run
+        return
+    finally:
+        probe.close()
+    raise OSError(errno.EADDRINUSE, "another server is listening on", sock_path)
+
+
+def _serve_unix(sock_path: str) -> socketserver.UnixStreamServer:
+    _remove_stale_socket(sock_path)
+    server = socketserver.ThreadingUnixStreamServer(sock_path, PIIUnixHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    request_queue_size = 128  # default of 5 resets connections under bursts
 
 
-def serve(port: int = DEFAULT_PORT, db_path: str = DEFAULT_DB) -> None:
-    """Start the PII redactor HTTP sidecar."""
+def serve(port: int = DEFAULT_PORT, db_path: str = DEFAULT_DB, sock_path: str = DEFAULT_SOCK) -> None:
+    """Start the PII redactor HTTP sidecar (plus the Unix socket if sock_path is set)."""
     global _db_path
     _db_path = db_path
 
-    server = HTTPServer(("127.0.0.1", port), PIIHandler)
+    _get_redactor()  # starts the Presidio warmup before the first request arrives
+    server = _HTTPServer(("127.0.0.1", port), PIIHandler)
+    unix_server = _serve_unix(sock_path) if sock_path else None
     print(f"pii-redactor sidecar listening on http://127.0.0.1:{port}")
+    if sock_path:
+        print(f"  unix socket: {sock_path}")
     print(f"  vault db: {db_path}")
     print(f"  presidio: {'enabled' if os.environ.get('PII_REDACTOR_NO_PRESIDIO', '') == '' else 'disabled'}")
     try:
@@ -136,6 +301,11 @@ def serve(port: int = DEFAULT_PORT, db_path: str = DEFAULT_DB) -> None:
     except KeyboardInterrupt:
         print("\nShutting down...")
         server.shutdown()
+    finally:
+        if unix_server is not None:
+            unix_server.shutdown()
+            unix_server.server_close()
+            os.unlink(sock_path)
 
 
 if __name__ == "__main__":
@@ -143,5 +313,6 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="PII Redactor HTTP sidecar")
     parser.add_argument("--port", type=int, default=DEFAULT_PORT)
     parser.add_argument("--db", default=DEFAULT_DB)
+    parser.add_argument("--sock", default=DEFAULT_SOCK, help="Also listen on this Unix socket")
     args = parser.parse_args()
-    serve(port=args.port, db_path=args.db)
+    serve(port=args.port, db_path=args.db, sock_path=args.sock)
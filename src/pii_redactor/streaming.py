@@ -14,86 +14,148 @@ Usage:
             yield ready_text
     # Flush any remaining buffer
     yield rehydrator.flush()
+
+Pass min_emit_bytes to coalesce small chunks into fewer, larger writes.
 """
 
 from __future__ import annotations
 import re
-
-from .vault import Vault
+from typing import Protocol
 
 
 # Match opening guillemet that might be a token start
 _TOKEN_START = re.compile(r"«")
-_TOKEN_COMPLETE = re.compile(r"«[A-Z_]+_\d{3}»")
+_TOKEN_COMPLETE = re.compile(r"«[A-Z_]+_\d{3,}»")
+_MIN_TOKEN_LEN = len("«X_000»")  # shorter remainders can't hold a complete token
+
+
+class _VaultLike(Protocol):
+    """What the rehydrator needs — satisfied by both Vault and SqliteVault."""
+
+    def rehydrate(self, text: str) -> str: ...
+
+    def lookup_token(self, token: str) -> str | None: ...
 
 
 class StreamingRehydrator:
     """Buffers streaming chunks and rehydrates complete tokens."""
 
-    __slots__ = ("_vault", "_buffer", "_max_token_len")
+    __slots__ = (
+        "_vault", "_buffer", "_scanned_upto", "_max_token_len", "_min_emit", "_pending", "_pending_len",
+    )
 
-    def __init__(self, vault: Vault, *, max_token_len: int = 40) -> None:
+    def __init__(self, vault: _VaultLike, *, max_token_len: int = 40, min_emit_bytes: int = 0) -> None:
         self._vault = vault
         self._buffer = ""
+        self._scanned_upto = 0  # leading chars of _buffer known to hold no »
         self._max_token_len = max_token_len  # safety limit
+        # Coalesce output until at least this many characters are ready;
+        # 0 emits after every chunk (lowest latency)
+        self._min_emit = min_emit_bytes
+        self._pending: list[str] = []
+        self._pending_len = 0
 
     def feed(self, chunk: str) -> str:
         """Feed a chunk, return any text ready to emit."""
         self._buffer += chunk
-        return self._drain()
+        ready = self._drain()
+        if not self._min_emit:
+            return ready
+        if ready:
+            self._pending.append(ready)
+            self._pending_len += len(ready)
+        if self._pending_len < self._min_emit:
+            return ""
+        return self._take_pending()
 
     def flush(self) -> str:
         """Flush remaining buffer (call at end of stream)."""
         out = self._buffer
         self._buffer = ""
+        self._scanned_upto = 0
         # Final rehydration pass on whatever's left
-        return self._vault.rehydrate(out)
+        tail = self._vault.rehydrate(out)
+        if self._pending:
+            return self._take_pending() + tail
+        return tail
+
+    def _take_pending(self) -> str:
+        out = "".join(self._pending)
+        self._pending.clear()
+        self._pending_len = 0
+        return out
 
     def _drain(self) -> str:
-        """Extract and rehydrate complete portions of the buffer."""
+        """Extract and rehydrate complete portions of the buffer.
+
+        Walks the buffer with a read cursor and slices off the consumed
+        prefix once at the end, so each drain is linear in the buffer.
+        """
+        buf = self._buffer
+        if "«" not in buf:
+            # Common case: plain text and nothing held back — no list, no join
+            self._buffer = ""
+            return buf
+
+        n = len(buf)
+        pos = 0
+        # The held-back partial token was already searched for », so only
+        # the newly fed text needs scanning
+        scanned = self._scanned_upto
         out_parts: list[str] = []
 
-        while self._buffer:
+        while pos < n:
             # Look for a potential token start
-            idx = self._buffer.find("«")
+            idx = buf.find("«", pos)
 
             if idx == -1:
-                # No token start — emit everything
-                out_parts.append(self._vault.rehydrate(self._buffer))
-                self._buffer = ""
+                # No token start — nothing to rehydrate, emit verbatim
+                out_parts.append(buf[pos:])
+                pos = n
                 break
 
-            if idx > 0:
+            if idx > pos:
                 # Emit everything before the potential token
-                out_parts.append(self._vault.rehydrate(self._buffer[:idx]))
-                self._buffer = self._buffer[idx:]
+                out_parts.append(buf[pos:idx])
+                pos = idx
 
-            # Now buffer starts with «
+            # Now the cursor sits on «
             # Check if we have a complete token
-            m = _TOKEN_COMPLETE.match(self._buffer)
+            m = _TOKEN_COMPLETE.match(buf, pos) if n - pos >= _MIN_TOKEN_LEN else None
             if m:
                 token = m.group()
                 replacement = self._vault.lookup_token(token)
                 out_parts.append(replacement if replacement else token)
-                self._buffer = self._buffer[m.end():]
+                pos = m.end()
+                continue
+
+            # Look for a closing » no further away than the longest token
+            limit = pos + self._max_token_len + 1
+            close_idx = buf.find("»", max(pos, scanned), limit)
+            # Tokens never contain «, so another « before the » means this
+            # one is stray — emit up to the next « and try again from there
+            next_open = buf.find("«", pos + 1, limit if close_idx == -1 else close_idx)
+            if next_open != -1:
+                out_parts.append(buf[pos:next_open])
+                pos = next_open
                 continue
 
-            # Check if buffer is too long to be a valid token
-            close_idx = self._buffer.find("»")
             if close_idx != -1:
                 # We have a closing » but it didn't match the pattern
                 # Emit as-is (not a valid token)
-                out_parts.append(self._buffer[:close_idx + 1])
-                self._buffer = self._buffer[close_idx + 1:]
+                out_parts.append(buf[pos:close_idx + 1])
+                pos = close_idx + 1
                 continue
 
-            if len(self._buffer) > self._max_token_len:
+            if n - pos > self._max_token_len:
                 # Buffer too long, not a token — emit the «
                 out_parts.append("«")
-                self._buffer = self._buffer[1:]
+                pos += 1
                 continue
 
             # Still accumulating a potential token — wait for more data
             break
 
+        self._buffer = buf[pos:] if pos < n else ""
+        self._scanned_upto = n - pos
         return "".join(out_parts)
@@ -2,11 +2,15 @@
 
 from __future__ import annotations
 from dataclasses import dataclass, field
+from typing import NamedTuple
 
 
-@dataclass(frozen=True, slots=True)
-class EntityMatch:
-    """A single detected PII entity."""
+class EntityMatch(NamedTuple):
+    """A single detected PII entity.
+
+    A NamedTuple rather than a dataclass: detection creates one per match,
+    and tuple construction is roughly twice as fast as a frozen dataclass.
+    """
     entity_type: str       # e.g. "EMAIL", "PERSON", "PHONE"
     start: int
     end: int
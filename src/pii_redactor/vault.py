@@ -7,48 +7,105 @@ Design goals:
 """
 
 from __future__ import annotations
+import re
+import sys
 from collections import defaultdict
+from functools import lru_cache
+from typing import Callable
 
 
-# Token format: «TYPE_NNN» — uses guillemets to avoid collisions with normal text
-_TOKEN_FMT = "«{type}_{idx:03d}»"
+def format_token(entity_type: str, idx: int) -> str:
+    """Render the token string for a per-type token id.
+
+    Token format: «TYPE_NNN» — uses guillemets to avoid collisions with normal text.
+    """
+    return f"«{entity_type}_{idx:03d}»"
+
+
+@lru_cache(maxsize=64)
+def _token_pattern(entity_types: frozenset[str]) -> re.Pattern:
+    """One pattern matching tokens of just these types.
+
+    Limiting the alternation to types the vault actually issued lets stray
+    guillemets in model output fail on the first few characters.  Stdlib re
+    on purpose: the pattern has a literal « prefix, and sub() through the
+    re2 wrapper measured ~8× slower than re here.
+    """
+    types = "|".join(re.escape(t) for t in sorted(entity_types, key=len, reverse=True))
+    return re.compile(rf"«(?:{types})_\d{{3,}}»")
+
+
+def _rehydrate(text: str, lookup: Callable[[str], str | None], pattern: re.Pattern) -> str:
+    """Replace every known token in text with its original value in one pass."""
+    if "«" not in text:
+        return text
+
+    def replace(m: re.Match) -> str:
+        token = m.group()
+        original = lookup(token)
+        return token if original is None else original
+
+    return pattern.sub(replace, text)
 
 
 class Vault:
-    """Bidirectional PII ↔ token store, scoped to a session/conversation."""
+    """Bidirectional PII ↔ token store, scoped to a session/conversation.
+
+    Internally PII values map to small per-type integer ids; the «TYPE_NNN»
+    string is only rendered when a caller needs it.
+    """
 
-    __slots__ = ("_pii_to_token", "_token_to_pii", "_counters")
+    __slots__ = ("_pii_to_id", "_token_to_pii", "_counters", "_token_re")
 
     def __init__(self) -> None:
-        self._pii_to_token: dict[str, str] = {}    # "john@x.com" → «EMAIL_001»
+        self._pii_to_id: dict[str, dict[str, int]] = {}  # EMAIL → {"john@x.com": 1}
         self._token_to_pii: dict[str, str] = {}    # «EMAIL_001» → "john@x.com"
         self._counters: dict[str, int] = defaultdict(int)
+        self._token_re: re.Pattern | None = None   # rebuilt when a new entity type appears
 
     # ------------------------------------------------------------------
     # Core API
     # ------------------------------------------------------------------
 
+    def get_or_create_token_id(self, entity_type: str, original: str) -> int:
+        """Return the existing token id or create a new one for this PII value."""
+        bucket = self._pii_to_id.get(entity_type)
+        if bucket is None:
+            # Types and tokens live as long as the vault — intern them once
+            entity_type = sys.intern(entity_type)
+            bucket = self._pii_to_id[entity_type] = {}
+        idx = bucket.get(original)
+        if idx is not None:
+            return idx
+
+        idx = self._counters[entity_type] + 1
+        self._counters[entity_type] = idx
+        bucket[original] = idx
+        if idx == 1:
+            self._token_re = None
+        self._token_to_pii[sys.intern(format_token(entity_type, idx))] = original
+        return idx
+
+    def get_or_create_token_ids(self, pairs: list[tuple[str, str]]) -> list[int]:
+        """Bulk get_or_create_token_id for (entity_type, original) pairs, in order."""
+        return [self.get_or_create_token_id(etype, original) for etype, original in pairs]
+
     def get_or_create_token(self, entity_type: str, original: str) -> str:
         """Return existing token or create a new one for this PII value."""
-        key = f"{entity_type}::{original}"
-        if key in self._pii_to_token:
-            return self._pii_to_token[key]
-
-        self._counters[entity_type] += 1
-        token = _TOKEN_FMT.format(type=entity_type, idx=self._counters[entity_type])
+        return format_token(entity_type, self.get_or_create_token_id(entity_type, original))
 
-        self._pii_to_token[key] = token
-        self._token_to_pii[token] = original
-        return token
+    def get_or_create_tokens(self, pairs: list[tuple[str, str]]) -> list[str]:
+        """Bulk get_or_create_token for (entity_type, original) pairs, in order."""
+        ids = self.get_or_create_token_ids(pairs)
+        return [format_token(etype, idx) for (etype, _), idx in zip(pairs, ids)]
 
     def rehydrate(self, text: str) -> str:
         """Replace all tokens in text with their original PII values."""
-        result = text
-        # Replace longest tokens first to avoid partial matches
-        for token in sorted(self._token_to_pii, key=len, reverse=True):
-            if token in result:
-                result = result.replace(token, self._token_to_pii[token])
-        return result
+        if not self._token_to_pii:
+            return text
+        if self._token_re is None:
+            self._token_re = _token_pattern(frozenset(self._counters))
+        return _rehydrate(text, self._token_to_pii.get, self._token_re)
 
     def lookup_token(self, token: str) -> str | None:
         """Look up the original value for a token."""
@@ -56,7 +113,9 @@ class Vault:
 
     def lookup_pii(self, entity_type: str, original: str) -> str | None:
         """Look up the token for a PII value."""
-        return self._pii_to_token.get(f"{entity_type}::{original}")
+        bucket = self._pii_to_id.get(entity_type)
+        idx = None if bucket is None else bucket.get(original)
+        return None if idx is None else format_token(entity_type, idx)
 
     # ------------------------------------------------------------------
     # Introspection
@@ -70,7 +129,11 @@ class Vault:
         """Return a copy of the token→pii mapping (for debugging)."""
         return dict(self._token_to_pii)
 
+    def flush(self) -> None:
+        """No-op — kept so Vault and SqliteVault are interchangeable."""
+
     def clear(self) -> None:
-        self._pii_to_token.clear()
+        self._pii_to_id.clear()
         self._token_to_pii.clear()
         self._counters.clear()
+        self._token_re = None
@@ -5,16 +5,19 @@ Drop-in replacement for Vault when you need durability.
 Usage:
     vault = SqliteVault("session_abc", db_path="~/.pii-redactor/vault.db")
     # Same API as Vault: get_or_create_token, rehydrate, etc.
+    vault.flush()  # persist new mappings (close() also flushes)
 """
 
 from __future__ import annotations
 import os
+import re
 import sqlite3
-from collections import defaultdict
+import sys
+import threading
+from collections import OrderedDict, defaultdict
 from pathlib import Path
 
-
-_TOKEN_FMT = "«{type}_{idx:03d}»"
+from .vault import format_token, _rehydrate, _token_pattern
 
 _SCHEMA = """
 CREATE TABLE IF NOT EXISTS mappings (
@@ -35,107 +38,347 @@ CREATE TABLE IF NOT EXISTS counters (
 );
 """
 
+# WAL lets readers run alongside the writer; NORMAL only fsyncs at checkpoints.
+# Negative cache_size is in KiB — 64 MiB of page cache for point lookups.
+_PRAGMAS = """
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+PRAGMA temp_store = MEMORY;
+PRAGMA mmap_size = 268435456;
+PRAGMA cache_size = -65536;
+"""
+
+# New mappings are buffered in memory and written in one transaction on
+# flush(); past this many pending rows a flush happens automatically
+_AUTOFLUSH_ROWS = 1024
+
+# Bound on "original IN (...)" parameters per query (SQLite allows 999 by default)
+_PREFETCH_CHUNK = 500
+
+
+# Read-only connections skip the schema and journal setup the writer already did
+_READER_PRAGMAS = """
+PRAGMA query_only = ON;
+PRAGMA temp_store = MEMORY;
+PRAGMA mmap_size = 268435456;
+PRAGMA cache_size = -65536;
+"""
+
+# Idle read-only connections kept per file; extras are closed when returned
+_MAX_IDLE_READERS = 4
+
+
+class _SharedConnection:
+    """Connections for one database file, shared by every vault in the process.
+
+    All writes go through the single writer connection under the lock.
+    Cache-miss reads check out a read-only connection from a small pool
+    instead, so under WAL they run concurrently with each other and with
+    the writer.  The pool is not tied to threads: the sidecar starts a
+    thread per request, and per-thread connections would never be closed.
+    An in-memory database exists only on the writer connection, so its
+    reads go through the writer too.
+    """
+
+    __slots__ = ("path", "db", "lock", "refs", "in_memory", "_idle", "_pool_lock", "_closed")
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(_PRAGMAS + _SCHEMA)
+        self.lock = threading.RLock()  # serializes writes and cache updates
+        self.refs = 0
+        self.in_memory = path in (":memory:", "")
+        self._idle: list[sqlite3.Connection] = []
+        self._pool_lock = threading.Lock()  # separate from lock so reads never wait on writes
+        self._closed = False
+
+    def read(self, sql: str, params: tuple = ()) -> list[tuple]:
+        """Run a query on a pooled read-only connection and return all rows."""
+        if self.in_memory:
+            with self.lock:
+                return self.db.execute(sql, params).fetchall()
+        with self._pool_lock:
+            db = self._idle.pop() if self._idle else None
+        if db is None:
+            # Pooled connections move between threads
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.executescript(_READER_PRAGMAS)
+        try:
+            return db.execute(sql, params).fetchall()
+        finally:
+            with self._pool_lock:
+                if not self._closed and len(self._idle) < _MAX_IDLE_READERS:
+                    self._idle.append(db)
+                    db = None
+            if db is not None:
+                db.close()
+
+    def close(self) -> None:
+        with self._pool_lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for db in idle:
+            db.close()
+        self.db.close()
+
+
+_connections: dict[str, _SharedConnection] = {}
+_connections_lock = threading.Lock()
+
+
+def _acquire(path: str) -> _SharedConnection:
+    with _connections_lock:
+        shared = _connections.get(path)
+        if shared is None:
+            shared = _connections[path] = _SharedConnection(path)
+        shared.refs += 1
+        return shared
+
+
+def _release(path: str) -> None:
+    with _connections_lock:
+        shared = _connections[path]
+        shared.refs -= 1
+        if shared.refs == 0:
+            del _connections[path]
+            shared.close()
+
 
 class SqliteVault:
-    """Persistent bidirectional PII ↔ token store."""
+    """Persistent bidirectional PII ↔ token store.
+
+    Vaults on the same file share one connection, so creating one per
+    session is cheap and they are safe to use from multiple threads.
 
-    __slots__ = ("_session_id", "_db", "_cache_pii", "_cache_token", "_counters")
+    Mappings are read on demand with point queries and kept in bounded LRU
+    caches, so opening a large session costs one small counters query.
+    New mappings are served from memory immediately but only reach the
+    database on flush() (also done by close() and automatically once
+    enough rows are pending).
+    """
 
-    def __init__(self, session_id: str, *, db_path: str | Path = "vault.db") -> None:
+    __slots__ = (
+        "_session_id", "_path", "_shared", "_db", "_lock", "_cache_size",
+        "_cache_pii", "_cache_token", "_counters", "_pending", "_pending_tokens", "_token_re",
+    )
+
+    def __init__(
+        self, session_id: str, *, db_path: str | Path = "vault.db", cache_size: int = 8192,
+    ) -> None:
         self._session_id = session_id
         db_path = Path(db_path).expanduser()
         db_path.parent.mkdir(parents=True, exist_ok=True)
-        self._db = sqlite3.connect(str(db_path), check_same_thread=False)
-        self._db.executescript(_SCHEMA)
-
-        # In-memory caches (loaded from DB on init)
-        self._cache_pii: dict[str, str] = {}   # "TYPE::original" → token
-        self._cache_token: dict[str, str] = {}  # token → original
-        self._counters: dict[str, int] = defaultdict(int)
-        self._load()
-
-    def _load(self) -> None:
-        """Load existing mappings from DB into memory."""
-        rows = self._db.execute(
-            "SELECT entity_type, original, token FROM mappings WHERE session_id = ?",
-            (self._session_id,),
-        ).fetchall()
-        for etype, orig, token in rows:
-            key = f"{etype}::{orig}"
-            self._cache_pii[key] = token
-            self._cache_token[token] = orig
-
-        crows = self._db.execute(
-            "SELECT entity_type, count FROM counters WHERE session_id = ?",
-            (self._session_id,),
-        ).fetchall()
-        for etype, count in crows:
-            self._counters[etype] = count
+        self._path = str(db_path)
+        shared = self._shared = _acquire(self._path)
+        self._db = shared.db
+        self._lock = shared.lock
+        self._cache_size = cache_size
 
-    def get_or_create_token(self, entity_type: str, original: str) -> str:
-        key = f"{entity_type}::{original}"
-        if key in self._cache_pii:
-            return self._cache_pii[key]
+        # Bounded LRU caches in front of the mappings table
+        self._cache_pii: OrderedDict[tuple[str, str], int] = OrderedDict()  # (type, original) → token id
+        self._cache_token: OrderedDict[str, str] = OrderedDict()            # token → original
+        # Mappings not yet written; never evicted, so lookups can't miss them
+        self._pending: dict[tuple[str, str], int] = {}
+        self._pending_tokens: dict[str, str] = {}
+        self._token_re: re.Pattern | None = None  # rebuilt when a new entity type appears
+        with self._lock:
+            self._counters: dict[str, int] = defaultdict(int, (
+                (sys.intern(etype), count) for etype, count in self._db.execute(
+                    "SELECT entity_type, count FROM counters WHERE session_id = ?",
+                    (self._session_id,),
+                )
+            ))
 
-        self._counters[entity_type] += 1
-        token = _TOKEN_FMT.format(type=entity_type, idx=self._counters[entity_type])
+    def _remember(self, entity_type: str, original: str, idx: int, token: str) -> None:
+        """Insert a mapping into both LRU caches, evicting the oldest entries."""
+        # Types and tokens read back from the database are fresh strings — share one copy
+        entity_type = sys.intern(entity_type)
+        token = sys.intern(token)
+        self._cache_pii[(entity_type, original)] = idx
+        self._cache_token[token] = original
+        if len(self._cache_pii) > self._cache_size:
+            self._cache_pii.popitem(last=False)
+        if len(self._cache_token) > self._cache_size:
+            self._cache_token.popitem(last=False)
 
-        self._db.execute(
-            "INSERT OR REPLACE INTO counters (session_id, entity_type, count) VALUES (?, ?, ?)",
-            (self._session_id, entity_type, self._counters[entity_type]),
-        )
-        self._db.execute(
-            "INSERT INTO mappings (session_id, entity_type, original, token) VALUES (?, ?, ?, ?)",
-            (self._session_id, entity_type, original, token),
-        )
-        self._db.commit()
+    def _find_id(self, entity_type: str, original: str) -> int | None:
+        """Token id for a PII value — cache, then pending writes, then the database."""
+        key = (entity_type, original)
+        idx = self._cache_pii.get(key)
+        if idx is not None:
+            self._cache_pii.move_to_end(key)
+            return idx
+        idx = self._pending.get(key)
+        if idx is not None:
+            return idx
+        row = self._db.execute(
+            "SELECT token FROM mappings WHERE session_id = ? AND entity_type = ? AND original = ?",
+            (self._session_id, entity_type, original),
+        ).fetchone()
+        if row is None:
+            return None
+        token = row[0]
+        idx = int(token[len(entity_type) + 2:-1])  # «TYPE_NNN» → NNN
+        self._remember(entity_type, original, idx, token)
+        return idx
 
-        self._cache_pii[key] = token
-        self._cache_token[token] = original
-        return token
+    def _prefetch(self, pairs: list[tuple[str, str]]) -> set[tuple[str, str]]:
+        """Cache the stored mappings for uncached pairs with one query per type.
+
+        Returns the pairs that are confirmed absent from the database.
+        """
+        missing: dict[str, set[str]] = defaultdict(set)
+        for etype, original in pairs:
+            key = (etype, original)
+            if key not in self._cache_pii and key not in self._pending:
+                missing[etype].add(original)
+        absent: set[tuple[str, str]] = set()
+        for etype, originals in missing.items():
+            remaining = list(originals)
+            for i in range(0, len(remaining), _PREFETCH_CHUNK):
+                chunk = remaining[i:i + _PREFETCH_CHUNK]
+                found = set()
+                for original, token in self._db.execute(
+                    "SELECT original, token FROM mappings WHERE session_id = ? AND entity_type = ?"
+                    f" AND original IN ({','.join('?' * len(chunk))})",
+                    (self._session_id, etype, *chunk),
+                ):
+                    self._remember(etype, original, int(token[len(etype) + 2:-1]), token)
+                    found.add(original)
+                absent.update((etype, original) for original in chunk if original not in found)
+        return absent
+
+    def get_or_create_token_id(self, entity_type: str, original: str) -> int:
+        return self.get_or_create_token_ids([(entity_type, original)])[0]
+
+    def get_or_create_token_ids(self, pairs: list[tuple[str, str]]) -> list[int]:
+        """Bulk get_or_create_token_id — new mappings are queued for the next flush()."""
+        with self._lock:
+            # One query per type instead of one per uncached pair
+            absent = self._prefetch(pairs) if len(pairs) > 1 else set()
+            ids: list[int] = []
+            for entity_type, original in pairs:
+                key = (entity_type, original)
+                idx = None if key in absent else self._find_id(entity_type, original)
+                if idx is None:
+                    absent.discard(key)
+                    entity_type = sys.intern(entity_type)
+                    idx = self._counters[entity_type] + 1
+                    self._counters[entity_type] = idx
+                    if idx == 1:
+                        self._token_re = None
+                    token = sys.intern(format_token(entity_type, idx))
+                    self._pending[(entity_type, original)] = idx
+                    self._pending_tokens[token] = original
+                    self._remember(entity_type, original, idx, token)
+                ids.append(idx)
+            if len(self._pending) >= _AUTOFLUSH_ROWS:
+                self.flush()
+            return ids
+
+    def get_or_create_token(self, entity_type: str, original: str) -> str:
+        return format_token(entity_type, self.get_or_create_token_id(entity_type, original))
+
+    def get_or_create_tokens(self, pairs: list[tuple[str, str]]) -> list[str]:
+        ids = self.get_or_create_token_ids(pairs)
+        return [format_token(etype, idx) for (etype, _), idx in zip(pairs, ids)]
 
     def rehydrate(self, text: str) -> str:
-        result = text
-        for token in sorted(self._cache_token, key=len, reverse=True):
-            if token in result:
-                result = result.replace(token, self._cache_token[token])
-        return result
+        if not self._counters:
+            return text
+        pattern = self._token_re
+        if pattern is None:
+            with self._lock:
+                pattern = self._token_re = _token_pattern(frozenset(self._counters))
+        return _rehydrate(text, self.lookup_token, pattern)
 
     def lookup_token(self, token: str) -> str | None:
-        return self._cache_token.get(token)
+        with self._lock:
+            original = self._cache_token.get(token)
+            if original is not None:
+                self._cache_token.move_to_end(token)
+                return original
+            original = self._pending_tokens.get(token)
+            if original is not None:
+                return original
+        # Miss — query outside the lock so other threads aren't held up
+        rows = self._shared.read(
+            "SELECT entity_type, original FROM mappings WHERE session_id = ? AND token = ?",
+            (self._session_id, token),
+        )
+        if not rows:
+            return None
+        etype, original = rows[0]
+        idx = int(token[len(etype) + 2:-1])
+        with self._lock:
+            # Don't resurrect a mapping the session was cleared of meanwhile
+            if self._counters.get(etype, 0) >= idx:
+                self._remember(etype, original, idx, token)
+        return original
 
     def lookup_pii(self, entity_type: str, original: str) -> str | None:
-        return self._cache_pii.get(f"{entity_type}::{original}")
+        with self._lock:
+            idx = self._find_id(entity_type, original)
+        return None if idx is None else format_token(entity_type, idx)
 
     @property
     def size(self) -> int:
-        return len(self._cache_token)
+        self.flush()
+        return self._shared.read(
+            "SELECT COUNT(*) FROM mappings WHERE session_id = ?", (self._session_id,),
+        )[0][0]
 
     def dump(self) -> dict[str, str]:
-        return dict(self._cache_token)
+        self.flush()
+        return dict(self._shared.read(
+            "SELECT token, original FROM mappings WHERE session_id = ?", (self._session_id,),
+        ))
+
+    def flush(self) -> None:
+        """Write pending mappings and their counters in a single transaction."""
+        with self._lock:
+            if not self._pending:
+                return
+            etypes = {etype for etype, _ in self._pending}
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO counters (session_id, entity_type, count) VALUES (?, ?, ?)",
+                    [(self._session_id, etype, self._counters[etype]) for etype in etypes],
+                )
+                self._db.executemany(
+                    "INSERT INTO mappings (session_id, entity_type, original, token) VALUES (?, ?, ?, ?)",
+                    [
+                        (self._session_id, etype, original, format_token(etype, idx))
+                        for (etype, original), idx in self._pending.items()
+                    ],
+                )
+            self._pending.clear()
+            self._pending_tokens.clear()
 
     def clear(self) -> None:
-        self._db.execute("DELETE FROM mappings WHERE session_id = ?", (self._session_id,))
-        self._db.execute("DELETE FROM counters WHERE session_id = ?", (self._session_id,))
-        self._db.commit()
-        self._cache_pii.clear()
-        self._cache_token.clear()
-        self._counters.clear()
+        self.delete_session(self._session_id)
 
     def close(self) -> None:
-        self._db.close()
+        self.flush()
+        _release(self._path)
 
     def list_sessions(self) -> list[str]:
         """List all session IDs in the database."""
-        rows = self._db.execute("SELECT DISTINCT session_id FROM mappings").fetchall()
+        self.flush()
+        rows = self._shared.read("SELECT DISTINCT session_id FROM mappings")
         return [r[0] for r in rows]
 
     def delete_session(self, session_id: str) -> None:
         """Delete all mappings for a session."""
-        self._db.execute("DELETE FROM mappings WHERE session_id = ?", (session_id,))
-        self._db.execute("DELETE FROM counters WHERE session_id = ?", (session_id,))
-        self._db.commit()
-        if session_id == self._session_id:
-            self._cache_pii.clear()
-            self._cache_token.clear()
-            self._counters.clear()
+        with self._lock:
+            with self._db:
+                self._db.execute("DELETE FROM mappings WHERE session_id = ?", (session_id,))
+                self._db.execute("DELETE FROM counters WHERE session_id = ?", (session_id,))
+            if session_id == self._session_id:
+                self._pending.clear()
+                self._pending_tokens.clear()
+                self._cache_pii.clear()
+                self._cache_token.clear()
+                self._counters.clear()
+                self._token_re = None
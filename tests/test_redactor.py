@@ -1,12 +1,14 @@
 """Tests for the PII redactor — regex layer + vault + middleware."""
 
 import sys, os
+import pytest
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
-from pii_redactor import Redactor, Vault, RedactedMessage
+from pii_redactor import Redactor, Vault, SqliteVault, RedactedMessage, StreamingRehydrator
+from pii_redactor import vault_sqlite
 from pii_redactor.redactor import RedactorConfig
 from pii_redactor.middleware import RedactMiddleware
-from pii_redactor.patterns import scan_regex
+from pii_redactor.patterns import scan_regex, active_patterns, regex_scanner, _candidate_patterns, _PATTERNS
 
 
 # ── Regex Layer ──────────────────────────────────────────────────────
@@ -57,6 +59,63 @@ def test_no_false_positive_on_clean_text():
     assert len(high_conf) == 0
 
 
+def test_entity_match_is_slotted_and_immutable():
+    m = scan_regex("alice@example.com")[0]
+    assert not hasattr(m, "__dict__")
+    with pytest.raises(AttributeError):
+        m.start = 3
+
+
+def test_no_trigger_characters_skips_all_patterns():
+    assert _candidate_patterns("Sounds good, see you tomorrow!") == []
+
+
+def test_api_key_without_digits_still_detected():
+    matches = scan_regex("password: abcdefghijklmnopqrstuvwxyz")
+    assert [m.entity_type for m in matches] == ["API_KEY"]
+
+
+def test_prefilter_keeps_matching_patterns():
+    text = "Mail bob@x.com, call +1 234-567-8910, server 10.0.0.1, api_key=abcdefghijklmnopqrstuvwxyz"
+    candidates = _candidate_patterns(text)
+    for entity_type, pattern, _ in _PATTERNS:
+        if pattern.search(text):
+            assert any(c[0] == entity_type for c in candidates)
+
+
+def test_scan_regex_finds_late_matches_in_non_ascii_text():
+    text = "Grüße aus Köln. " * 200 + "Mail a@b.com, SSN 123-45-6789"
+    found = [(m.entity_type, m.text) for m in scan_regex(text)]
+    assert found == [("EMAIL", "a@b.com"), ("SSN", "123-45-6789")]
+
+
+@pytest.mark.parametrize("backend", ["re2", "hyperscan"])
+def test_prefilter_backends_handle_python_only_whitespace(backend, monkeypatch):
+    from pii_redactor import patterns
+    pytest.importorskip(backend)
+    if backend == "re2":
+        monkeypatch.setattr(patterns, "_hs", None)  # re2 is only used without hyperscan
+    scanner = patterns._scanner.__wrapped__(tuple(_PATTERNS))
+    for sep in ("\v", "\x1c", "\x1f"):
+        text = f"SSN 123{sep}45{sep}6789"
+        assert any(p[0] == "SSN" for p in scanner.candidates(text)), repr(sep)
+
+
+def test_scan_regex_with_active_patterns():
+    patterns = active_patterns({"EMAIL", "PHONE"})
+    assert all(p[0] not in ("EMAIL", "PHONE") for p in patterns)
+    matches = scan_regex("bob@x.com SSN 123-45-6789", patterns=patterns)
+    assert [m.entity_type for m in matches] == ["SSN"]
+    scanner = regex_scanner({"EMAIL", "PHONE"})
+    assert scan_regex("bob@x.com SSN 123-45-6789", scanner=scanner) == matches
+
+
+def test_redactor_resolves_regex_scanner_once():
+    redactor = Redactor(RedactorConfig(use_presidio=False, skip_types={"EMAIL"}))
+    assert redactor._scanner is regex_scanner({"EMAIL"})
+    assert Redactor(RedactorConfig(use_presidio=False))._scanner is regex_scanner()
+
+
 # ── Vault ────────────────────────────────────────────────────────────
 
 def test_vault_deterministic():
@@ -82,6 +141,218 @@ def test_vault_rehydrate():
     assert vault.rehydrate(text) == "Dear Alice, your email alice@x.com is confirmed."
 
 
+def test_vault_rehydrate_leaves_unknown_tokens():
+    vault = Vault()
+    vault.get_or_create_token("EMAIL", "a@b.com")
+    text = "«EMAIL_001» and «EMAIL_002» and «not a token»"
+    assert vault.rehydrate(text) == "a@b.com and «EMAIL_002» and «not a token»"
+
+
+def test_vault_rehydrate_picks_up_new_entity_types():
+    vault = Vault()
+    vault.get_or_create_token("EMAIL", "a@b.com")
+    assert vault.rehydrate("«EMAIL_001» «PERSON_001»") == "a@b.com «PERSON_001»"
+    vault.get_or_create_token("PERSON", "Alice")
+    assert vault.rehydrate("«EMAIL_001» «PERSON_001»") == "a@b.com Alice"
+
+
+def test_vault_rehydrate_wide_token_ids():
+    vault = Vault()
+    vault.get_or_create_tokens([("EMAIL", f"u{i}@x.com") for i in range(1, 1001)])
+    assert vault.rehydrate("«EMAIL_100» «EMAIL_1000»") == "u100@x.com u1000@x.com"
+
+
+def test_vault_bulk_tokens():
+    vault = Vault()
+    tokens = vault.get_or_create_tokens([("EMAIL", "a@b.com"), ("SSN", "123-45-6789"), ("EMAIL", "a@b.com")])
+    assert tokens == ["«EMAIL_001»", "«SSN_001»", "«EMAIL_001»"]
+
+
+def test_vault_token_ids():
+    vault = Vault()
+    assert vault.get_or_create_token_id("EMAIL", "a@b.com") == 1
+    assert vault.get_or_create_token_id("EMAIL", "c@d.com") == 2
+    assert vault.get_or_create_token_id("PHONE", "555-1234") == 1
+    assert vault.lookup_pii("EMAIL", "c@d.com") == "«EMAIL_002»"
+    assert vault.lookup_token("«PHONE_001»") == "555-1234"
+
+
+# ── SqliteVault ──────────────────────────────────────────────────────
+
+def test_sqlite_vault_bulk_tokens_persist(tmp_path):
+    db = tmp_path / "vault.db"
+    vault = SqliteVault("s1", db_path=db)
+    tokens = vault.get_or_create_tokens([("EMAIL", "a@b.com"), ("EMAIL", "c@d.com"), ("EMAIL", "a@b.com")])
+    assert tokens == ["«EMAIL_001»", "«EMAIL_002»", "«EMAIL_001»"]
+    vault.close()
+
+    reopened = SqliteVault("s1", db_path=db)
+    assert reopened.get_or_create_token("EMAIL", "c@d.com") == "«EMAIL_002»"
+    assert reopened.get_or_create_token("EMAIL", "e@f.com") == "«EMAIL_003»"
+    assert reopened.rehydrate("«EMAIL_001» «EMAIL_003»") == "a@b.com e@f.com"
+    reopened.close()
+
+
+def test_sqlite_vault_defers_writes_until_flush(tmp_path):
+    db = tmp_path / "vault.db"
+    vault = SqliteVault("s1", db_path=db)
+    other = SqliteVault("s1", db_path=db)  # a second vault sees only flushed rows
+    vault.get_or_create_token("EMAIL", "a@b.com")
+    assert other.size == 0
+    vault.flush()
+    assert other.size == 1
+    assert vault.get_or_create_token("EMAIL", "c@d.com") == "«EMAIL_002»"
+    vault.close()
+    assert other.lookup_token("«EMAIL_002»") == "c@d.com"
+    other.close()
+    assert str(db) not in vault_sqlite._connections
+
+
+def test_sqlite_vault_small_cache_falls_back_to_db(tmp_path):
+    db = tmp_path / "vault.db"
+    vault = SqliteVault("s1", db_path=db, cache_size=2)
+    pairs = [("EMAIL", f"u{i}@x.com") for i in range(1, 6)]
+    tokens = vault.get_or_create_tokens(pairs)
+    # Evicted but still unflushed
+    assert vault.get_or_create_tokens(pairs) == tokens
+    assert vault.rehydrate("«EMAIL_001» «EMAIL_005»") == "u1@x.com u5@x.com"
+    vault.close()
+
+    reopened = SqliteVault("s1", db_path=db, cache_size=2)
+    batch = [("EMAIL", "u3@x.com"), ("EMAIL", "n@x.com"), ("EMAIL", "u1@x.com"), ("EMAIL", "n@x.com")]
+    assert reopened.get_or_create_tokens(batch) == ["«EMAIL_003»", "«EMAIL_006»", "«EMAIL_001»", "«EMAIL_006»"]
+    assert reopened.lookup_pii("EMAIL", "u2@x.com") == "«EMAIL_002»"
+    assert reopened.rehydrate("«EMAIL_001» «EMAIL_004»") == "u1@x.com u4@x.com"
+    assert reopened.get_or_create_token("EMAIL", "new@x.com") == "«EMAIL_007»"
+    assert reopened.size == 7
+    reopened.close()
+
+
+def test_sqlite_vaults_share_connection(tmp_path):
+    db = tmp_path / "vault.db"
+    a = SqliteVault("a", db_path=db)
+    b = SqliteVault("b", db_path=db)
+    a.get_or_create_token("EMAIL", "a@x.com")
+    a.close()
+    assert b.get_or_create_token("EMAIL", "b@x.com") == "«EMAIL_001»"
+    assert sorted(b.list_sessions()) == ["a", "b"]
+    b.clear()
+    assert b.list_sessions() == ["a"]
+    b.close()
+
+
+def test_sqlite_vault_readers_bounded_across_short_lived_threads(tmp_path):
+    import threading
+    from pii_redactor.vault_sqlite import _MAX_IDLE_READERS
+    vault = SqliteVault("s1", db_path=tmp_path / "vault.db")
+    vault.get_or_create_token("EMAIL", "a@x.com")
+    vault.flush()
+    fd_dir = "/proc/self/fd"
+    fds_before = len(os.listdir(fd_dir)) if os.path.isdir(fd_dir) else None
+    for _ in range(30):
+        threads = [threading.Thread(target=vault.list_sessions) for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    assert len(vault._shared._idle) <= _MAX_IDLE_READERS
+    if fds_before is not None:
+        # Each SQLite connection holds a few fds (db, -wal, -shm)
+        assert len(os.listdir(fd_dir)) - fds_before <= 3 * _MAX_IDLE_READERS
+    vault.close()
+
+
+def test_sqlite_vault_lookup_token_lru_keeps_recent(tmp_path):
+    db = tmp_path / "vault.db"
+    vault = SqliteVault("s1", db_path=db)
+    vault.get_or_create_tokens([("EMAIL", "a@x.com"), ("EMAIL", "b@x.com"), ("EMAIL", "c@x.com")])
+    vault.close()
+
+    reopened = SqliteVault("s1", db_path=db, cache_size=2)
+    for token in ("«EMAIL_001»", "«EMAIL_002»", "«EMAIL_001»", "«EMAIL_003»"):
+        reopened.lookup_token(token)
+    assert list(reopened._cache_token) == ["«EMAIL_001»", "«EMAIL_003»"]
+    reopened.close()
+
+
+def test_sqlite_vault_concurrent_cache_miss_reads(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    db = tmp_path / "vault.db"
+    vault = SqliteVault("s1", db_path=db)
+    vault.get_or_create_tokens([("EMAIL", f"u{i}@x.com") for i in range(1, 201)])
+    vault.close()
+
+    reopened = SqliteVault("s1", db_path=db, cache_size=16)
+    def rehydrate(i):
+        return reopened.rehydrate(f"«EMAIL_{i:03d}»")
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(rehydrate, range(1, 201)))
+    assert results == [f"u{i}@x.com" for i in range(1, 201)]
+    reopened.close()
+
+
+def test_sqlite_vault_in_memory():
+    vault = SqliteVault("s1", db_path=":memory:", cache_size=1)
+    try:
+        a = vault.get_or_create_token("EMAIL", "a@b.com")
+        b = vault.get_or_create_token("EMAIL", "c@d.com")
+        vault.flush()
+        assert vault.size == 2
+        assert vault.rehydrate(f"{a} {b}") == "a@b.com c@d.com"
+        assert vault.list_sessions() == ["s1"]
+    finally:
+        vault.close()
+
+
+# ── StreamingRehydrator ──────────────────────────────────────────────
+
+def test_streaming_rehydrator_split_tokens():
+    vault = Vault()
+    vault.get_or_create_token("PERSON", "Alice")
+    text = "Hi «PERSON_001», see «X» and «PER"
+    rehydrator = StreamingRehydrator(vault)
+    out = "".join(rehydrator.feed(ch) for ch in text) + rehydrator.flush()
+    assert out == "Hi Alice, see «X» and «PER"
+
+
+def test_streaming_rehydrator_many_tokens_in_one_chunk():
+    vault = Vault()
+    vault.get_or_create_tokens([("PERSON", "Alice"), ("PERSON", "Bob")])
+    rehydrator = StreamingRehydrator(vault)
+    out = rehydrator.feed("«PERSON_001»«PERSON_002» x «PERSON_001» «Y» «PERSON_00")
+    assert out == "AliceBob x Alice «Y» "
+    assert rehydrator.feed("2»!") == "Bob!"
+
+
+def test_streaming_rehydrator_wide_ids_and_stray_guillemets():
+    vault = Vault()
+    vault.get_or_create_tokens([("EMAIL", f"u{i}@x.com") for i in range(1, 1001)])
+    rehydrator = StreamingRehydrator(vault, max_token_len=20)
+    text = "«EMAIL_1000» « " + "x" * 30 + " «EMAIL_002» »"
+    out = "".join(rehydrator.feed(ch) for ch in text) + rehydrator.flush()
+    assert out == "u1000@x.com « " + "x" * 30 + " u2@x.com »"
+
+
+def test_streaming_rehydrator_stray_guillemet_before_token():
+    vault = Vault()
+    vault.get_or_create_token("PERSON", "Alice")
+    text = "see « and «PERSON_001» ok"
+    assert StreamingRehydrator(vault).feed(text) == vault.rehydrate(text) == "see « and Alice ok"
+    rehydrator = StreamingRehydrator(vault)
+    out = "".join(rehydrator.feed(ch) for ch in text) + rehydrator.flush()
+    assert out == "see « and Alice ok"
+
+
+def test_streaming_rehydrator_coalesces_output():
+    vault = Vault()
+    vault.get_or_create_token("PERSON", "Alice")
+    rehydrator = StreamingRehydrator(vault, min_emit_bytes=16)
+    assert rehydrator.feed("Hi «PERSON_001»") == ""
+    assert rehydrator.feed(", how are you?") == "Hi Alice, how are you?"
+    assert rehydrator.feed(" Bye «PER") == ""
+    assert rehydrator.flush() == " Bye «PER"
+
+
 # ── Redactor (regex-only mode) ───────────────────────────────────────
 
 def test_redact_email():
@@ -102,6 +373,14 @@ def test_redact_multiple():
     assert "123-45-6789" not in result.text
 
 
+def test_redact_numbers_tokens_in_text_order():
+    r = Redactor(RedactorConfig(use_presidio=False))
+    v = Vault()
+    result = r.redact("Email john@a.com or jane@b.com today", v)
+    assert result.text == "Email «EMAIL_001» or «EMAIL_002» today"
+    assert v.rehydrate(result.text) == "Email john@a.com or jane@b.com today"
+
+
 def test_redact_allow_list():
     r = Redactor(RedactorConfig(use_presidio=False, allow_list={"john@acme.com"}))
     v = Vault()
@@ -117,6 +396,60 @@ def test_redact_skip_types():
     assert "123-45-6789" not in result.text
 
 
+def test_redact_messages_parallel_matches_serial(monkeypatch):
+    import pii_redactor.presidio_layer as presidio_layer
+    monkeypatch.setattr(presidio_layer, "scan_presidio", lambda text, **kwargs: [])
+    messages = [
+        {"role": "system", "content": "You are helpful."},
+        {"role": "user", "content": "I'm a@x.com"},
+        {"role": "assistant", "content": None},
+        {"role": "user", "content": "Also b@x.com and a@x.com"},
+    ]
+    parallel = Redactor(RedactorConfig(use_presidio=True)).redact_messages(messages, Vault())
+    serial = Redactor(RedactorConfig(use_presidio=False)).redact_messages(messages, Vault())
+    assert parallel == serial
+    assert parallel[3]["content"] == "Also «EMAIL_002» and «EMAIL_001»"
+    assert parallel[2] is messages[2]
+
+
+def test_presidio_default_model_falls_back_when_not_installed(monkeypatch):
+    import types
+    import pii_redactor.presidio_layer as presidio_layer
+    installed = set()
+    spacy_util = types.SimpleNamespace(is_package=lambda name: name in installed)
+    monkeypatch.setitem(sys.modules, "spacy", types.SimpleNamespace(util=spacy_util))
+    monkeypatch.setitem(sys.modules, "spacy.util", spacy_util)
+    monkeypatch.setattr(presidio_layer, "_default_model", presidio_layer._default_model.__wrapped__)
+    assert presidio_layer._default_model("en") == "en_core_web_sm"
+    installed.add("en_spacy_pii_fast")
+    assert presidio_layer._default_model("en") == "en_spacy_pii_fast"
+    assert presidio_layer._default_model("de") == "de_core_web_sm"
+
+
+def test_presidio_layer_filters_allow_list_and_regex_spans(monkeypatch):
+    import pii_redactor.presidio_layer as presidio_layer
+    fake = lambda *args: (("PERSON", 0, 5, 0.9), ("PERSON", 10, 13, 0.9), ("URL", 19, 26, 0.5))
+    monkeypatch.setattr(presidio_layer, "_analyze", fake)
+    text = "Alice and Bob, see a@x.com"
+    matches = presidio_layer.scan_presidio(text, exclude_spans=[(19, 26)], allow_list={"Bob"})
+    assert [m.text for m in matches] == ["Alice"]
+
+
+def test_presidio_analysis_cache_keys_on_digest(monkeypatch):
+    import types
+    from collections import OrderedDict
+    import pii_redactor.presidio_layer as presidio_layer
+    calls = []
+    result = types.SimpleNamespace(entity_type="PERSON", start=0, end=5, score=0.9)
+    engine = types.SimpleNamespace(analyze=lambda text, **kwargs: calls.append(text) or [result])
+    monkeypatch.setattr(presidio_layer, "_get_engine", lambda language, model_name: engine)
+    monkeypatch.setattr(presidio_layer, "_analyze_cache", OrderedDict())
+    for _ in range(3):
+        assert [m.text for m in presidio_layer.scan_presidio("Alice says hi")] == ["Alice"]
+    assert calls == ["Alice says hi"]
+    assert not any("Alice says hi" in key for key in presidio_layer._analyze_cache)
+
+
 # ── Middleware ───────────────────────────────────────────────────────
 
 def test_middleware_roundtrip():
@@ -158,6 +491,94 @@ def test_consistency_across_messages():
     assert token1 == token2  # same PII → same token
 
 
+# ── CLI sidecar forwarding ───────────────────────────────────────────
+
+def test_cli_forwards_to_sidecar_on_same_vault(tmp_path, monkeypatch, capsys):
+    import argparse
+    import io
+    import json
+    from pii_redactor import cli, server
+    monkeypatch.setenv("PII_REDACTOR_NO_PRESIDIO", "1")
+    monkeypatch.setattr(server, "_redactor", None)
+    monkeypatch.setattr(server, "_redactors", {})
+    monkeypatch.setattr(server, "_vaults", {})
+    monkeypatch.setattr(server, "_db_path", str(tmp_path / "sidecar.db"))
+    sock_path = str(tmp_path / "s.sock")
+    unix_server = server._serve_unix(sock_path)
+    monkeypatch.setenv("PII_REDACTOR_SOCK", sock_path)
+
+    def args(**overrides):
+        base = dict(db=str(tmp_path / "sidecar.db"), session_id="s1", no_presidio=True,
+                    language="en", model="", threshold=0.35, skip_types="", allow_list="")
+        return argparse.Namespace(**{**base, **overrides})
+
+    def redact_text(ns, text):
+        monkeypatch.setattr(sys, "stdin", io.StringIO(text))
+        cli.cmd_redact_text(ns)
+        return json.loads(capsys.readouterr().out)["text"]
+
+    try:
+        assert server._handle_post("redact-text", {"session_id": "s1", "text": "a@b.com"})[1]["text"] == "«EMAIL_001»"
+        # Mismatched settings are honoured by the sidecar, not run beside it
+        assert redact_text(args(skip_types="EMAIL"), "c@d.com 555-123-4567") == "c@d.com «PHONE_001»"
+        assert redact_text(args(allow_list="a@b.com"), "a@b.com e@f.com") == "a@b.com «EMAIL_002»"
+        assert redact_text(args(), "e@f.com g@h.com") == "«EMAIL_002» «EMAIL_003»"
+        assert not (tmp_path / "other.db").exists()
+        assert cli._connect_sidecar(args(db=str(tmp_path / "other.db"))) is None
+    finally:
+        unix_server.shutdown()
+        unix_server.server_close()
+        for vault in server._vaults.values():
+            vault.close()
+
+
+def test_cli_redact_streams_with_ijson(tmp_path, monkeypatch, capsys):
+    import argparse
+    import io
+    import json
+    from pii_redactor import cli
+    pytest.importorskip("ijson")
+    monkeypatch.delenv("PII_REDACTOR_SOCK", raising=False)
+    args = argparse.Namespace(db=str(tmp_path / "v.db"), session_id="s1", no_presidio=True,
+                              language="en", model="", threshold=0.35, skip_types="", allow_list="")
+
+    def redact(raw):
+        monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(raw.encode())))
+        cli.cmd_redact(args)
+        return capsys.readouterr().out
+
+    messages = [{"role": "user", "content": "mail a@b.com", "seq": 2**70, "t": 0.5}, {"role": "assistant"}]
+    assert json.loads(redact(json.dumps(messages))) == [
+        {"role": "user", "content": "mail «EMAIL_001»", "seq": 2**70, "t": 0.5}, {"role": "assistant"},
+    ]
+    with pytest.raises(SystemExit):
+        redact(json.dumps({"messages": messages}))
+
+
+def test_serve_unix_only_replaces_stale_sockets(tmp_path):
+    import errno
+    import socket
+    from pii_redactor import server
+    regular = tmp_path / "notes.txt"
+    regular.write_text("keep me")
+    with pytest.raises(FileExistsError):
+        server._serve_unix(str(regular))
+    assert regular.read_text() == "keep me"
+
+    sock_path = str(tmp_path / "s.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(sock_path)
+    stale.close()  # socket file left behind, nobody listening
+    live = server._serve_unix(sock_path)
+    try:
+        with pytest.raises(OSError) as exc:
+            server._serve_unix(sock_path)
+        assert exc.value.errno == errno.EADDRINUSE
+    finally:
+        live.shutdown()
+        live.server_close()
+
+
 if __name__ == "__main__":
     import pytest
     pytest.main([__file__, "-v"])